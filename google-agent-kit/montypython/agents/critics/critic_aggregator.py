@@ -17,7 +17,28 @@ critic_aggregator_agent = Agent(
     description='Aggregates all critic reports into a summary',
     instruction="""You are aggregating consistency reports from all critic agents.
 
-Review the previous 7 agent outputs and extract the Overall Adherence Grade and Degradation Score from each.
+Extract the Overall Adherence Grade and Degradation Score from each of the 7 critic reports below.
+
+JOHN CLEESE REPORT:
+{critic_john_report?}
+
+ERIC IDLE REPORT:
+{critic_eric_report?}
+
+MICHAEL PALIN REPORT:
+{critic_michael_report?}
+
+GRAHAM CHAPMAN REPORT:
+{critic_graham_report?}
+
+TERRY JONES REPORT:
+{critic_terry_j_report?}
+
+TERRY GILLIAM REPORT:
+{critic_terry_g_report?}
+
+DIRECTOR REPORT:
+{critic_director_report?}
 
 OUTPUT FORMAT (table only, 3 lines maximum):
 
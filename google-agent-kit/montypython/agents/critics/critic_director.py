@@ -28,6 +28,7 @@ Paragraph 1: Overall Adherence Grade (X/10) and Degradation Score (X/10). Brief
 
 Paragraph 2: Key observation about selection patterns - did strategy remain consistent, improve, or degrade over time? One specific example of best selection and one of worst selection.
 
-Be concise and objective. Focus on whether selections aligned with stated director strategy.""",,
+Be concise and objective. Focus on whether selections aligned with stated director strategy.""",
+    output_key='critic_director_report',
     before_model_callback=rate_limit_callback
 )
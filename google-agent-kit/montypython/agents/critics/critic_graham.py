@@ -33,5 +33,6 @@ Paragraph 1: Overall Adherence Grade (X/10) and Degradation Score (X/10). Brief
 Paragraph 2: Key observation about consistency patterns - did quality remain stable, improve, or degrade over time? One specific example of best adherence and one of worst deviation.
 
 Be concise and objective. Focus on instruction adherence, not comedic quality.""",
+    output_key='critic_graham_report',
     before_model_callback=rate_limit_callback
 )
@@ -1,10 +1,10 @@
 """Director agent for orchestrating the Monty Python improv scene"""
 
 from google.adk.agents.llm_agent import Agent
-from google.adk.agents import LoopAgent, SequentialAgent
+from google.adk.agents import LoopAgent, ParallelAgent, SequentialAgent
 from google.adk.models.lite_llm import LiteLlm
 from ..config import Config
-from ..callbacks import rate_limit_callback
+from ..callbacks import rate_limit_callback, reset_turn_counter_callback, turn_counter_callback
 from ..tools.scene_tools import get_scene_flow_distribution, initiate_dialogue_exchange
 
 
@@ -22,15 +22,24 @@ def _get_critic_agents():
     from .critics.critic_director import critic_director_agent
     from .critics.critic_aggregator import critic_aggregator_agent
     
-    # Return all critics followed by aggregator
+    # Critics only read the finished scene, so they run concurrently;
+    # the aggregator waits for all of them via their output_key reports
+    critic_panel = ParallelAgent(
+        name='critic_panel',
+        description='Runs all consistency critics concurrently',
+        sub_agents=[
+            critic_john_agent,
+            critic_eric_agent,
+            critic_michael_agent,
+            critic_graham_agent,
+            critic_terry_j_agent,
+            critic_terry_g_agent,
+            critic_director_agent
+        ]
+    )
+    
     return [
-        critic_john_agent,
-        critic_eric_agent,
-        critic_michael_agent,
-        critic_graham_agent,
-        critic_terry_j_agent,
-        critic_terry_g_agent,
-        critic_director_agent,
+        critic_panel,
         critic_aggregator_agent
     ]
 
@@ -82,6 +91,8 @@ FIRST: Call get_scene_flow_distribution() to understand the scene phase boundari
 - min_turns: Minimum turns before considering completion
 - max_turns: Maximum turns before automatic completion
 
+Turns completed so far: {{turn_counter?}}
+
 SCENE ANALYSIS FRAMEWORK:
 
 Before selecting the next performer, analyze the scene state:
@@ -191,7 +202,8 @@ Select strategically and transfer immediately.
 """,
     tools=[get_scene_flow_distribution],
     sub_agents=[],  # Will be configured later
-    before_model_callback=rate_limit_callback
+    before_model_callback=rate_limit_callback,
+    after_model_callback=turn_counter_callback
 )
 
 
@@ -223,7 +235,9 @@ def _get_performance_loop():
     return LoopAgent(
         name='performance_loop',
         sub_agents=[director_delegator_agent],
-        max_iterations=Config.MAX_TURNS
+        max_iterations=Config.MAX_TURNS,
+        # Each scene starts counting turns from zero
+        before_agent_callback=reset_turn_counter_callback
     )
 
 
@@ -1,5 +1,6 @@
 """Callback functions for Monty Python Improv System"""
 
 from .rate_limit import rate_limit_callback
+from .turn_counter import reset_turn_counter_callback, turn_counter_callback
 
-__all__ = ["rate_limit_callback"]
+__all__ = ["rate_limit_callback", "reset_turn_counter_callback", "turn_counter_callback"]
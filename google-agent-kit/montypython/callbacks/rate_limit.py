@@ -1,5 +1,6 @@
 """Rate limiting callback for API requests"""
 
+import json
 import logging
 import time
 
@@ -12,8 +13,11 @@ logger.setLevel(logging.DEBUG)
 # Rate limit configuration
 # Based on 50,000 input TPM org limit with safety buffer
 RATE_LIMIT_SECS = 60  # Time window in seconds
+RATE_LIMIT_NS = RATE_LIMIT_SECS * 10**9  # Time window in nanoseconds
+NS_PER_SEC = 10**9
 RPM_QUOTA = 20  # Requests per minute quota
 TPM_QUOTA = 30000  # Tokens per minute quota (with 10k buffer from 50k org limit)
+SMALL_REQUEST_TOKENS = 50  # Requests below this size skip token bookkeeping
 
 
 def _estimate_tokens(llm_request: LlmRequest) -> int:
@@ -40,6 +44,38 @@ def _estimate_tokens(llm_request: LlmRequest) -> int:
     return max(estimated_tokens, 1)  # Minimum 1 token
 
 
+def _start_window(
+    state, now: int, estimated_tokens: int, reason: str = "", elapsed_ns: int = 0, sleep_ns: int = 0
+) -> None:
+    """Open a new rate limit window at now, counting the current request.
+    
+    Every window reset goes through here, so this is where the one structured
+    record per window is logged (instead of one line per request).
+    
+    Args:
+        state: Session state holding the rate limit counters.
+        now: monotonic_ns reading the new window starts at.
+        estimated_tokens: Token estimate of the current request.
+        reason: Why the previous window closed ("rpm_quota", "tpm_quota",
+                "expired" or "clock_changed").
+        elapsed_ns: Age of the previous window when it closed.
+        sleep_ns: Time slept before opening the new window.
+    """
+    if "timer_start" in state and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({
+            "event": "rate_window_close",
+            "reason": reason,
+            "requests": state["request_count"],
+            "tokens": state["token_count"],
+            "elapsed_secs": elapsed_ns // NS_PER_SEC,
+            "sleep_secs": sleep_ns // NS_PER_SEC,
+        }))
+    
+    state["timer_start"] = now
+    state["request_count"] = 1
+    state["token_count"] = estimated_tokens
+
+
 def rate_limit_callback(
     callback_context: CallbackContext, llm_request: LlmRequest
 ) -> None:
@@ -63,54 +99,52 @@ def rate_limit_callback(
     # Estimate tokens for this request
     estimated_tokens = _estimate_tokens(llm_request)
     
-    now = time.time()
+    # Tiny requests (e.g. "pick next performer") are noise against the token
+    # quota - only count the request while comfortably under the RPM quota
+    request_count = callback_context.state.get("request_count", 0)
+    if (
+        estimated_tokens < SMALL_REQUEST_TOKENS
+        and "timer_start" in callback_context.state
+        and request_count < RPM_QUOTA // 2
+    ):
+        callback_context.state["request_count"] = request_count + 1
+        return
+    
+    # Monotonic integer clock: immune to wall-clock adjustments
+    now = time.monotonic_ns()
     
     # Initialize rate limit tracking on first request
     if "timer_start" not in callback_context.state:
-        callback_context.state["timer_start"] = now
-        callback_context.state["request_count"] = 1
-        callback_context.state["token_count"] = estimated_tokens
-        logger.debug(
-            "rate_limit_callback [timestamp: %i, req_count: 1, token_count: %i, elapsed_secs: 0]",
-            now,
-            estimated_tokens,
-        )
+        _start_window(callback_context.state, now, estimated_tokens)
+        return
+    
+    elapsed_ns = now - callback_context.state["timer_start"]
+    
+    # The window is over, or timer_start comes from another monotonic clock
+    # (session state is persisted, so it may have been written before a reboot
+    # or on another host): start a new window rather than sleeping on it
+    if elapsed_ns < 0 or elapsed_ns > RATE_LIMIT_NS:
+        reason = "clock_changed" if elapsed_ns < 0 else "expired"
+        _start_window(callback_context.state, now, estimated_tokens, reason, elapsed_ns)
         return
     
     # Track current request and tokens
     request_count = callback_context.state["request_count"] + 1
     token_count = callback_context.state["token_count"] + estimated_tokens
-    elapsed_secs = now - callback_context.state["timer_start"]
-    
-    logger.debug(
-        "rate_limit_callback [timestamp: %i, request_count: %i, token_count: %i, elapsed_secs: %i]",
-        now,
-        request_count,
-        token_count,
-        elapsed_secs,
-    )
     
     # Enforce rate limits (check both request and token quotas)
     if request_count > RPM_QUOTA or token_count > TPM_QUOTA:
-        delay = RATE_LIMIT_SECS - elapsed_secs + 1
-        if delay > 0:
-            reason = []
-            if request_count > RPM_QUOTA:
-                reason.append(f"requests: {request_count}/{RPM_QUOTA}")
-            if token_count > TPM_QUOTA:
-                reason.append(f"tokens: {token_count}/{TPM_QUOTA}")
-            
-            logger.debug(
-                "Sleeping for %i seconds to respect rate limit (%s)",
-                delay,
-                ", ".join(reason)
-            )
-            time.sleep(delay)
+        # Never sleep longer than one full window (plus the safety second)
+        delay_ns = min(max(RATE_LIMIT_NS - elapsed_ns + NS_PER_SEC, 0), RATE_LIMIT_NS + NS_PER_SEC)
+        
+        if delay_ns > 0:
+            time.sleep(delay_ns / NS_PER_SEC)
+            # The new window starts when the sleep ends, not when it began
+            now = time.monotonic_ns()
         
         # Reset timer window
-        callback_context.state["timer_start"] = now
-        callback_context.state["request_count"] = 1
-        callback_context.state["token_count"] = estimated_tokens
+        reason = "rpm_quota" if request_count > RPM_QUOTA else "tpm_quota"
+        _start_window(callback_context.state, now, estimated_tokens, reason, elapsed_ns, delay_ns)
     else:
         callback_context.state["request_count"] = request_count
         callback_context.state["token_count"] = token_count
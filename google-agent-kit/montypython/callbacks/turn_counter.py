@@ -0,0 +1,62 @@
+"""Turn counting callback for the director agent"""
+
+import logging
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+TURN_COUNTER_KEY = "turn_counter"
+
+
+def turn_counter_callback(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """Callback function that counts scene turns in session state.
+
+    A turn is counted each time the director hands the scene to a performer
+    (a transfer_to_agent call). Keeping the count on the Python side means
+    the director never spends a model round-trip just to track turns.
+
+    Args:
+        callback_context: A CallbackContext object representing the active
+                         callback context.
+        llm_response: A LlmResponse object representing the model response.
+
+    Returns:
+        None, so the original response is used unchanged.
+    """
+    if llm_response.partial or not llm_response.content or not llm_response.content.parts:
+        return None
+
+    for part in llm_response.content.parts:
+        if part.function_call and part.function_call.name == "transfer_to_agent":
+            turn = callback_context.state.get(TURN_COUNTER_KEY, 0) + 1
+            callback_context.state[TURN_COUNTER_KEY] = turn
+            logger.debug("turn_counter_callback [turn: %i]", turn)
+            break
+
+    return None
+
+
+def reset_turn_counter_callback(
+    callback_context: CallbackContext,
+) -> Optional[types.Content]:
+    """Callback function that restarts the turn count for a new scene.
+
+    Session state outlives a single scene: every user message in the same
+    session runs the whole pipeline again, so the count is reset before the
+    performance loop starts instead of carrying over from the last scene.
+
+    Args:
+        callback_context: A CallbackContext object representing the active
+                         callback context.
+
+    Returns:
+        None, so the agent runs normally.
+    """
+    callback_context.state[TURN_COUNTER_KEY] = 0
+    return None
@@ -12,14 +12,14 @@ class Config:
     MIN_TURNS = 5
     MAX_TURNS = 15  # Increased to allow for proper escalation and dynamic completion
     
-    PERFORMERS = [
+    PERFORMERS = (
         'john_agent',
         'graham_agent',
         'terry_j_agent',
         'terry_g_agent',
         'eric_agent',
         'michael_agent'
-    ]
+    )
     
     # Performance comparison mode toggle
     # Set to True to use single consolidated agent
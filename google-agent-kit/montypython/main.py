@@ -1,8 +1,12 @@
-"""Main entry point for Monty Python Improv System"""
+"""Main entry point for Monty Python Improv System
+
+Run as a module (python -m montypython.main) so that the agents and this
+entry point share the single montypython.config module.
+"""
 
 from google.adk.runners import InMemoryRunner
-from agents.director import director_agent, get_single_agent_director
-from config import Config
+from .agents.director import director_agent, get_single_agent_director
+from .config import Config
 
 
 def main():
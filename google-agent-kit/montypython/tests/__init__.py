@@ -0,0 +1 @@
+# Tests for Monty Python improv callbacks
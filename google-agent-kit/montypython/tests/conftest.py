@@ -0,0 +1,8 @@
+"""
+Pytest configuration for Monty Python improv tests.
+"""
+import sys
+from pathlib import Path
+
+# Add the directory containing the montypython package to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
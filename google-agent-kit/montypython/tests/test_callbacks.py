@@ -0,0 +1,191 @@
+import json
+import logging
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from montypython.callbacks.rate_limit import (
+    NS_PER_SEC,
+    RATE_LIMIT_NS,
+    RPM_QUOTA,
+    SMALL_REQUEST_TOKENS,
+    rate_limit_callback,
+)
+from montypython.callbacks.turn_counter import (
+    TURN_COUNTER_KEY,
+    reset_turn_counter_callback,
+    turn_counter_callback,
+)
+
+
+def _context(state=None):
+    """Minimal stand-in for CallbackContext: the callbacks only use .state."""
+    return SimpleNamespace(state={} if state is None else state)
+
+
+def _response(*parts, partial=False):
+    """Model response with the given parts."""
+    return LlmResponse(content=types.Content(role="model", parts=list(parts)), partial=partial)
+
+
+def _transfer(agent_name="john_agent"):
+    """transfer_to_agent call, as the director emits when handing the scene to a performer."""
+    return types.Part(function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": agent_name}))
+
+
+def _request(chars=400):
+    """LLM request large enough to go through token bookkeeping."""
+    return LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text="x" * chars)])])
+
+
+class TestRateLimit:
+    """Tests for the rate limit callback."""
+    
+    NOW = 1_000 * NS_PER_SEC
+    
+    def _call(self, state, *later):
+        """Run the callback at NOW (then the later clock readings); returns the mocked time.sleep."""
+        with patch("montypython.callbacks.rate_limit.time.monotonic_ns", side_effect=[self.NOW, *later]), \
+                patch("montypython.callbacks.rate_limit.time.sleep") as mock_sleep:
+            rate_limit_callback(_context(state), _request())
+        return mock_sleep
+    
+    def test_sleeps_until_window_ends(self):
+        """Exceeding the quota inside the window sleeps out the rest of it."""
+        state = {"timer_start": self.NOW - 20 * NS_PER_SEC, "request_count": RPM_QUOTA, "token_count": 0}
+        
+        mock_sleep = self._call(state, self.NOW + 41 * NS_PER_SEC)
+        
+        mock_sleep.assert_called_once_with(41)
+        # The new window opens when the sleep ends
+        assert state["timer_start"] == self.NOW + 41 * NS_PER_SEC
+        assert state["request_count"] == 1
+    
+    def test_timer_from_another_clock_starts_new_window(self):
+        """A timer_start from before a reboot (elapsed < 0) never sleeps."""
+        state = {"timer_start": self.NOW + 10**6 * NS_PER_SEC, "request_count": RPM_QUOTA, "token_count": 0}
+        
+        mock_sleep = self._call(state)
+        
+        mock_sleep.assert_not_called()
+        assert state["timer_start"] == self.NOW
+        assert state["request_count"] == 1
+    
+    def test_expired_window_starts_new_window(self):
+        """A window older than RATE_LIMIT_NS is replaced instead of accumulating."""
+        state = {"timer_start": self.NOW - RATE_LIMIT_NS - NS_PER_SEC, "request_count": RPM_QUOTA, "token_count": 0}
+        
+        mock_sleep = self._call(state)
+        
+        mock_sleep.assert_not_called()
+        assert state["timer_start"] == self.NOW
+        assert state["request_count"] == 1
+    
+    def test_logs_one_record_per_window_reset(self, caplog):
+        """Throttled and expired windows both log a single rate_window_close record."""
+        throttled = {"timer_start": self.NOW - 20 * NS_PER_SEC, "request_count": RPM_QUOTA, "token_count": 500}
+        expired = {"timer_start": self.NOW - RATE_LIMIT_NS - NS_PER_SEC, "request_count": 3, "token_count": 700}
+        
+        with caplog.at_level(logging.DEBUG, logger="montypython.callbacks.rate_limit"):
+            self._call(throttled, self.NOW + 41 * NS_PER_SEC)
+            self._call(expired)
+        
+        records = [json.loads(record.getMessage()) for record in caplog.records]
+        assert records == [
+            {"event": "rate_window_close", "reason": "rpm_quota", "requests": RPM_QUOTA,
+             "tokens": 500, "elapsed_secs": 20, "sleep_secs": 41},
+            {"event": "rate_window_close", "reason": "expired", "requests": 3,
+             "tokens": 700, "elapsed_secs": RATE_LIMIT_NS // NS_PER_SEC + 1, "sleep_secs": 0},
+        ]
+    
+    def test_requests_inside_window_are_not_logged(self, caplog):
+        """Requests that stay under quota only update the counters."""
+        state = {"timer_start": self.NOW - 20 * NS_PER_SEC, "request_count": 1, "token_count": 0}
+        
+        with caplog.at_level(logging.DEBUG, logger="montypython.callbacks.rate_limit"):
+            self._call(state)
+        
+        assert caplog.records == []
+        assert state["request_count"] == 2
+
+    
+    def _call_small(self, state):
+        """Run the callback with a request just under SMALL_REQUEST_TOKENS; returns (monotonic_ns, sleep) mocks."""
+        with patch("montypython.callbacks.rate_limit.time.monotonic_ns", return_value=self.NOW) as mock_clock, \
+                patch("montypython.callbacks.rate_limit.time.sleep") as mock_sleep:
+            rate_limit_callback(_context(state), _request(chars=4 * (SMALL_REQUEST_TOKENS - 1)))
+        return mock_clock, mock_sleep
+    
+    def test_small_request_skips_bookkeeping(self):
+        """A tiny request only bumps request_count: no clock read, no sleep, no tokens."""
+        state = {"timer_start": self.NOW - 20 * NS_PER_SEC, "request_count": 3, "token_count": 500}
+        
+        mock_clock, mock_sleep = self._call_small(state)
+        
+        mock_clock.assert_not_called()
+        mock_sleep.assert_not_called()
+        assert state == {"timer_start": self.NOW - 20 * NS_PER_SEC, "request_count": 4, "token_count": 500}
+    
+    def test_small_first_request_opens_window(self):
+        """Without a timer_start the shortcut is not taken, so the window still gets opened."""
+        state = {}
+        
+        mock_clock, _ = self._call_small(state)
+        
+        mock_clock.assert_called_once()
+        assert state == {"timer_start": self.NOW, "request_count": 1, "token_count": SMALL_REQUEST_TOKENS - 1}
+    
+    def test_small_request_shortcut_stops_at_half_quota(self):
+        """From RPM_QUOTA // 2 requests on, tiny requests go through full bookkeeping."""
+        state = {"timer_start": self.NOW - 20 * NS_PER_SEC, "request_count": RPM_QUOTA // 2, "token_count": 500}
+        
+        mock_clock, _ = self._call_small(state)
+        
+        mock_clock.assert_called_once()
+        assert state["request_count"] == RPM_QUOTA // 2 + 1
+        assert state["token_count"] == 500 + SMALL_REQUEST_TOKENS - 1
+
+
+class TestTurnCounter:
+    """Tests for the turn counter callbacks."""
+    
+    def test_counts_transfer_to_agent(self):
+        """Each transfer to a performer counts one turn."""
+        context = _context()
+        
+        assert turn_counter_callback(context, _response(_transfer())) is None
+        turn_counter_callback(context, _response(_transfer("eric_agent")))
+        
+        assert context.state[TURN_COUNTER_KEY] == 2
+    
+    def test_ignores_other_responses(self):
+        """Text, other tool calls and partial responses don't count."""
+        context = _context()
+        other_call = types.Part(function_call=types.FunctionCall(name="get_scene_flow_distribution", args={}))
+        
+        turn_counter_callback(context, _response(types.Part(text="Thinking about the scene")))
+        turn_counter_callback(context, _response(other_call))
+        turn_counter_callback(context, _response(_transfer(), partial=True))
+        turn_counter_callback(context, LlmResponse())
+        
+        assert TURN_COUNTER_KEY not in context.state
+    
+    def test_counts_one_turn_per_response(self):
+        """A response with several transfer calls is still one turn."""
+        context = _context()
+        
+        turn_counter_callback(context, _response(_transfer(), _transfer("eric_agent")))
+        
+        assert context.state[TURN_COUNTER_KEY] == 1
+    
+    def test_resets_per_scene(self):
+        """A new scene in the same session starts counting from zero."""
+        context = _context({TURN_COUNTER_KEY: 15})
+        
+        assert reset_turn_counter_callback(context) is None
+        assert context.state[TURN_COUNTER_KEY] == 0
+        
+        turn_counter_callback(context, _response(_transfer()))
+        assert context.state[TURN_COUNTER_KEY] == 1
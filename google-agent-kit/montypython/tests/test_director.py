@@ -0,0 +1,30 @@
+import re
+
+from google.adk.agents import ParallelAgent
+
+from montypython.agents.director import root_agent
+
+
+def _sub_agent(name):
+    """Top-level pipeline step with the given name."""
+    return next(agent for agent in root_agent.sub_agents if agent.name == name)
+
+
+class TestCriticPipeline:
+    """Tests for how the critics are wired into the director pipeline."""
+    
+    def test_critics_run_in_parallel_before_aggregator(self):
+        """All critics sit in one ParallelAgent that runs right before the aggregator."""
+        names = [agent.name for agent in root_agent.sub_agents]
+        critic_panel = _sub_agent("critic_panel")
+        
+        assert isinstance(critic_panel, ParallelAgent)
+        assert names.index("critic_aggregator_agent") == names.index("critic_panel") + 1
+        assert len(critic_panel.sub_agents) == 7
+    
+    def test_aggregator_reads_every_critic_report(self):
+        """Each report key in the aggregator's template is some critic's output_key, and vice versa."""
+        output_keys = {critic.output_key for critic in _sub_agent("critic_panel").sub_agents}
+        template_keys = set(re.findall(r"\{(critic_\w+_report)\??\}", _sub_agent("critic_aggregator_agent").instruction))
+        
+        assert template_keys == output_keys
@@ -81,18 +81,6 @@ def initiate_dialogue_exchange(agent_a: str, agent_b: str, exchange_turns: int =
     }
 
 
-def increment_turn_count() -> int:
-    """
-    Increment and return the current turn count.
-    
-    Returns:
-        Updated turn count
-    """
-    # The director will handle turn counting via instructions
-    # This is a placeholder tool that the LLM can call
-    return 1
-
-
 def get_sentence_count() -> int:
     """
     Get a random number of sentences the performer should say.
@@ -1,5 +1,7 @@
+import os
 import pytest
 import tempfile
+import time
 import shutil
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -8,12 +10,18 @@ import subprocess
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from tools.repo_scanner import clone_repository, scan_and_analyze_repository
+from tools.repo_scanner import clone_repository, count_lines_in_file, scan_and_analyze_repository
 
 
 class TestCloneRepository:
     """Tests for clone_repository function."""
     
+    @pytest.fixture(autouse=True)
+    def without_pygit2(self):
+        """Exercise the git CLI path whether or not pygit2 is installed."""
+        with patch('tools.repo_scanner.pygit2', None):
+            yield
+    
     def test_clone_repository_success(self):
         """Test successful repository cloning."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -39,6 +47,8 @@ class TestCloneRepository:
                 assert "clone" in call_args
                 assert "--depth" in call_args
                 assert "1" in call_args
+                assert "--single-branch" in call_args
+                assert "--filter=blob:none" not in call_args
     
     def test_clone_repository_already_exists(self):
         """Test cloning when directory already exists with content."""
@@ -114,6 +124,156 @@ class TestCloneRepository:
                 assert "git" in call_args
                 assert "clone" in call_args
                 assert "--depth" not in call_args
+                assert "--filter=blob:none" in call_args
+
+
+class TestCloneRepositoryPygit2:
+    """Tests for clone_repository when pygit2 is available."""
+    
+    class FakeGitError(Exception):
+        pass
+    
+    class FakeRemoteCallbacks:
+        pass
+    
+    @pytest.fixture
+    def mock_pygit2(self):
+        """Patch in a fake pygit2 module with real exception and callback base classes."""
+        with patch('tools.repo_scanner.pygit2') as mock_pygit2:
+            mock_pygit2.GitError = self.FakeGitError
+            mock_pygit2.RemoteCallbacks = self.FakeRemoteCallbacks
+            mock_pygit2.settings = None
+            yield mock_pygit2
+    
+    def test_clone_with_pygit2_success(self, mock_pygit2):
+        """Test that pygit2 is used in-process instead of the git CLI."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target_dir = Path(tmpdir) / "test_repo"
+            
+            with patch('subprocess.run') as mock_run:
+                result = clone_repository(
+                    repo_url="https://github.com/test/repo.git",
+                    target_dir=str(target_dir),
+                    shallow=True
+                )
+                
+                assert result["status"] == "success"
+                assert result["path"] is not None
+                mock_run.assert_not_called()
+                args, kwargs = mock_pygit2.clone_repository.call_args
+                assert args == ("https://github.com/test/repo.git", str(target_dir))
+                assert kwargs["depth"] == 1
+                assert isinstance(kwargs["callbacks"], self.FakeRemoteCallbacks)
+    
+    def test_clone_with_pygit2_no_shallow(self, mock_pygit2):
+        """Test that full clones use the git CLI (partial clone) even with pygit2 installed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target_dir = Path(tmpdir) / "test_repo"
+            
+            with patch('subprocess.run') as mock_run:
+                mock_run.return_value = MagicMock(returncode=0, stderr='')
+                
+                result = clone_repository(
+                    repo_url="https://github.com/test/repo.git",
+                    target_dir=str(target_dir),
+                    shallow=False
+                )
+                
+                assert result["status"] == "success"
+                mock_pygit2.clone_repository.assert_not_called()
+                assert "--filter=blob:none" in mock_run.call_args[0][0]
+    
+    def test_clone_with_pygit2_timeout(self, mock_pygit2):
+        """Test that the deadline cancels the clone and removes the partial checkout."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target_dir = Path(tmpdir) / "test_repo"
+            
+            def slow_clone(url, path, depth, callbacks):
+                (Path(path) / "partial.txt").write_text("half a checkout")
+                # libgit2 reports progress; the deadline has already passed
+                callbacks.transfer_progress(None)
+                raise AssertionError("clone was not cancelled")
+            
+            mock_pygit2.clone_repository.side_effect = slow_clone
+            with patch('tools.repo_scanner.CLONE_TIMEOUT_SECONDS', -1):
+                result = clone_repository(
+                    repo_url="https://github.com/test/repo.git",
+                    target_dir=str(target_dir)
+                )
+            
+            assert result["status"] == "error"
+            assert "timed out" in result["message"]
+            assert result["path"] is None
+            assert not target_dir.exists()
+    
+    def test_clone_with_pygit2_failure(self, mock_pygit2):
+        """Test failed cloning through pygit2 removes the partial checkout."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target_dir = Path(tmpdir) / "test_repo"
+            
+            def failing_clone(url, path, depth, callbacks):
+                (Path(path) / "partial.txt").write_text("half a checkout")
+                raise self.FakeGitError("repository not found")
+            
+            mock_pygit2.clone_repository.side_effect = failing_clone
+            result = clone_repository(
+                repo_url="https://github.com/test/invalid.git",
+                target_dir=str(target_dir)
+            )
+            
+            assert result["status"] == "error"
+            assert "Failed to clone" in result["message"]
+            assert result["path"] is None
+            assert not target_dir.exists()
+    
+    def test_clone_with_old_pygit2_falls_back_to_cli(self, mock_pygit2):
+        """Test that a pygit2 without depth= support falls back to the git CLI."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target_dir = Path(tmpdir) / "test_repo"
+            mock_pygit2.clone_repository.side_effect = TypeError("unexpected keyword argument 'depth'")
+            
+            with patch('subprocess.run') as mock_run:
+                mock_run.return_value = MagicMock(returncode=0, stderr='')
+                
+                result = clone_repository(
+                    repo_url="https://github.com/test/repo.git",
+                    target_dir=str(target_dir)
+                )
+                
+                assert result["status"] == "success"
+                call_args = mock_run.call_args[0][0]
+                assert "--depth" in call_args
+                assert "--single-branch" in call_args
+
+
+class TestCountLinesInFile:
+    """Tests for count_lines_in_file function."""
+    
+    @pytest.mark.parametrize("content, expected", [
+        (b"", 0),
+        (b"one\ntwo\n", 2),
+        (b"one\ntwo", 2),
+        (b"one\r\ntwo\r\n", 2),
+        (b"one\rtwo\r", 2),
+        (b"one\r\n\rtwo\n\nthree", 5),
+    ])
+    def test_count_lines(self, tmp_path, content, expected):
+        """Line endings are counted the same way text-mode iteration does."""
+        file_path = tmp_path / "sample.txt"
+        file_path.write_bytes(content)
+        
+        assert count_lines_in_file(str(file_path)) == expected
+    
+    def test_count_lines_crlf_across_blocks(self, tmp_path):
+        """A CRLF pair split across read blocks is one line ending."""
+        file_path = tmp_path / "sample.txt"
+        file_path.write_bytes(b"x" * ((1 << 18) - 1) + b"\r\nlast\n")
+        
+        assert count_lines_in_file(str(file_path)) == 2
+    
+    def test_count_lines_missing_file(self, tmp_path):
+        """Unreadable files count as 0 lines."""
+        assert count_lines_in_file(str(tmp_path / "missing.txt")) == 0
 
 
 class TestScanAndAnalyzeRepository:
@@ -197,6 +357,26 @@ class TestScanAndAnalyzeRepository:
         dir_paths = [d["path"] for d in result["directory_stats"]]
         assert not any("node_modules" in path for path in dir_paths)
     
+    def test_scan_excludes_glob_patterns(self, test_repo):
+        """Test that directories matching exclude patterns are not scanned."""
+        (test_repo / "pkg.egg-info").mkdir()
+        (test_repo / "pkg.egg-info" / "PKG-INFO").write_text("Name: pkg")
+        (test_repo / ".mypy_cache").mkdir()
+        (test_repo / ".mypy_cache" / "data.json").write_text("{}")
+        
+        result = scan_and_analyze_repository(
+            root_path=str(test_repo),
+            repo_name="test_repo",
+            exclude_patterns=["*.egg-info", ".*cache"]
+        )
+        
+        assert result["status"] == "success"
+        dir_paths = list(result["directory_hierarchy"])
+        assert "pkg.egg-info" not in dir_paths
+        assert ".mypy_cache" not in dir_paths
+        assert "src" in dir_paths
+        assert "node_modules" not in dir_paths
+    
     def test_scan_largest_files(self, test_repo):
         """Test largest files detection."""
         result = scan_and_analyze_repository(
@@ -236,6 +416,78 @@ class TestScanAndAnalyzeRepository:
             assert "subdirectories" in stat
             assert "file_types" in stat
     
+    def test_scan_aggregates_subdirectory_lines(self, test_repo):
+        """Test that directory line totals include all nested subdirectories."""
+        result = scan_and_analyze_repository(
+            root_path=str(test_repo),
+            repo_name="test_repo"
+        )
+        
+        hierarchy = result["directory_hierarchy"]
+        assert hierarchy["src/utils"]["total_lines"] == 1
+        assert hierarchy["src"]["total_lines"] == 2
+        assert hierarchy["."]["total_lines"] == result["total_lines"]
+    
+    def test_scan_hierarchy_is_top_down_preorder(self, test_repo):
+        """Test that directory_hierarchy lists directories in os.walk top-down order."""
+        (test_repo / "src" / "utils" / "deep").mkdir()
+        expected = []
+        for dirpath, dirnames, _ in os.walk(test_repo):
+            dirnames[:] = [name for name in dirnames if name != "node_modules"]
+            rel_path = os.path.relpath(dirpath, test_repo).replace(os.sep, "/")
+            expected.append(rel_path)
+        
+        result = scan_and_analyze_repository(root_path=str(test_repo), repo_name="test_repo")
+        
+        assert list(result["directory_hierarchy"]) == expected
+    
+    def test_scan_parallel_matches_sequential(self, test_repo):
+        """Test that streamed parallel counting over several batches matches a sequential scan."""
+        bulk = test_repo / "src" / "bulk"
+        bulk.mkdir()
+        for i in range(1200):
+            (bulk / f"module_{i}.py").write_text("x = 1\n" * (i % 7))
+        
+        sequential = scan_and_analyze_repository(root_path=str(test_repo), parallel=False)
+        parallel = scan_and_analyze_repository(root_path=str(test_repo), parallel=True, max_workers=2)
+        
+        for result in (sequential, parallel):
+            result.pop("indexed_at")
+        assert parallel == sequential
+        assert sequential["total_files"] == 1206
+    
+    def test_scan_threaded_traversal_matches_sequential(self, test_repo):
+        """Test that concurrent directory listing matches a sequential scan, nested totals included."""
+        for i in range(40):
+            nested = test_repo / "src" / f"pkg_{i % 5}" / f"sub_{i}"
+            nested.mkdir(parents=True)
+            for j in range(30):
+                (nested / f"mod_{j}.py").write_text("x = 1\n" * (j % 4 + 1))
+        
+        sequential = scan_and_analyze_repository(root_path=str(test_repo), parallel=False)
+        threaded = scan_and_analyze_repository(
+            root_path=str(test_repo), parallel=True, max_workers=2, traversal_workers=4
+        )
+        
+        # Directory ids follow completion order, so compare independently of ordering
+        def normalize(result):
+            return {
+                path: (
+                    data["total_files"],
+                    data["total_lines"],
+                    sorted(data["file_types"].items()),
+                    sorted(data["subdirectories"])
+                )
+                for path, data in result["directory_hierarchy"].items()
+            }
+        
+        assert normalize(threaded) == normalize(sequential)
+        assert threaded["total_lines"] == sequential["total_lines"]
+        assert threaded["directory_hierarchy"]["."]["total_lines"] == sequential["total_lines"]
+        assert threaded["directory_hierarchy"]["src"]["total_lines"] == sequential["directory_hierarchy"]["src"]["total_lines"]
+        assert threaded["file_type_distribution"] == sequential["file_type_distribution"]
+        assert sorted(f["lines"] for f in threaded["files_by_lines"]) == sorted(f["lines"] for f in sequential["files_by_lines"])
+    
     def test_scan_nonexistent_path(self):
         """Test scanning non-existent path."""
         result = scan_and_analyze_repository(
@@ -285,6 +537,64 @@ class TestScanAndAnalyzeRepository:
         from datetime import datetime
         datetime.fromisoformat(result["indexed_at"])  # Should not raise
     
+    @staticmethod
+    def _age_directories(repo_path, mtime):
+        """Backdate every directory's mtime so its listing is old enough to be cached."""
+        for directory in [repo_path, *(p for p in repo_path.rglob("*") if p.is_dir())]:
+            os.utime(directory, (mtime, mtime))
+    
+    def test_rescan_picks_up_new_files(self, test_repo):
+        """Test that cached directory listings are refreshed when a directory changes."""
+        self._age_directories(test_repo, time.time() - 3600)
+        first = scan_and_analyze_repository(
+            root_path=str(test_repo),
+            repo_name="test_repo",
+            cache_listings=True
+        )
+        
+        (test_repo / "src" / "extra.py").write_text("x = 1\ny = 2\n")
+        
+        second = scan_and_analyze_repository(
+            root_path=str(test_repo),
+            repo_name="test_repo",
+            cache_listings=True
+        )
+        
+        assert second["total_files"] == first["total_files"] + 1
+        assert second["directory_hierarchy"]["src"]["total_files"] == first["directory_hierarchy"]["src"]["total_files"] + 1
+    
+    def test_listing_cache_is_opt_in(self, test_repo):
+        """Test that listings are only reused when cache_listings is set."""
+        aged = time.time() - 3600
+        self._age_directories(test_repo, aged)
+        scan_and_analyze_repository(root_path=str(test_repo), cache_listings=True)
+        
+        # A change that keeps the directory's mtime is only visible without the cache
+        (test_repo / "src" / "extra.py").write_text("x = 1\n")
+        os.utime(test_repo / "src", (aged, aged))
+        
+        cached = scan_and_analyze_repository(root_path=str(test_repo), cache_listings=True)
+        uncached = scan_and_analyze_repository(root_path=str(test_repo))
+        
+        assert uncached["total_files"] == cached["total_files"] + 1
+    
+    def test_scan_skips_binary_and_large_files(self, test_repo):
+        """Test that binary extensions and files over max_file_bytes count as 0 lines."""
+        (test_repo / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\n" * 10)
+        (test_repo / "big.txt").write_text("line\n" * 1000)
+        
+        result = scan_and_analyze_repository(
+            root_path=str(test_repo),
+            repo_name="test_repo",
+            max_file_bytes=1024
+        )
+        
+        assert result["status"] == "success"
+        lines_by_path = {f["path"]: f["lines"] for f in result["files_by_lines"]}
+        assert lines_by_path["logo.png"] == 0
+        assert lines_by_path["big.txt"] == 0
+        assert lines_by_path["README.md"] == 1
+    
     def test_scan_empty_directory(self):
         """Test scanning an empty directory."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -2,7 +2,9 @@ from .repo_scanner import clone_repository, scan_and_analyze_repository
 from .output_formatter import (
     save_index_to_file,
     format_hierarchy_tree,
+    write_hierarchy_tree_to_stream,
     format_index_to_text,
+    write_index_to_stream,
     create_documentation_index
 )
 from .index_saver import save_all_indexes
@@ -12,7 +14,9 @@ __all__ = [
     'scan_and_analyze_repository',
     'save_index_to_file',
     'format_hierarchy_tree',
+    'write_hierarchy_tree_to_stream',
     'format_index_to_text',
+    'write_index_to_stream',
     'create_documentation_index',
     'save_all_indexes',
 ]
@@ -1,7 +1,71 @@
+import heapq
+from operator import attrgetter, itemgetter
+
+import jinja2
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
 from datetime import datetime
 
+from .output_formatter import format_bytes
+
+
+# Report layout, compiled once at import into a single render function
+# instead of many f-string writes on every call
+_EQ = "=" * 80
+_DASH = "-" * 80
+
+_REPORT_TEMPLATE_SOURCE = """\
+{{ eq }}
+REPOSITORY INDEX REPORT
+{{ eq }}
+Repository: {{ index.repository_name }}
+URL: {{ index.repository_url }}
+Indexed at: {{ index.indexed_at.strftime('%Y-%m-%d %H:%M:%S') }}
+
+{{ dash }}
+SUMMARY STATISTICS
+{{ dash }}
+Total Files: {{ index.total_files | fmt(',') }}
+Total Directories: {{ index.total_directories | fmt(',') }}
+Total Size: {{ index.total_size_bytes | fmtbytes }}
+Maximum Depth: {{ index.depth_levels }}
+
+{{ dash }}
+FILE TYPE DISTRIBUTION
+{{ dash }}
+{% for ext, count in top_file_types %}
+{{ (ext or '(no extension)') | fmt('20') }} {{ count | fmt('8,') }} files ({{ (count / index.total_files * 100 if index.total_files > 0 else 0) | fmt('5.2f') }}%)
+{% endfor %}
+
+{{ dash }}
+LARGEST FILES
+{{ dash }}
+{% for file_info in largest_files %}
+{{ loop.index | fmt('2') }}. {{ file_info.size_bytes | fmtbytes | fmt('>10') }} - {{ file_info.path }}
+{% endfor %}
+
+{{ dash }}
+DIRECTORY STATISTICS (Top 20 by file count)
+{{ dash }}
+{% for dir_stat, top_types in top_dirs %}
+
+{{ dir_stat.path }}
+  Files: {{ dir_stat.total_files | fmt(',') }} | Subdirs: {{ dir_stat.subdirectories | fmt(',') }} | Size: {{ dir_stat.total_size_bytes | fmtbytes }}
+{% if top_types %}
+  Top types: {% for ext, count in top_types %}{{ ext }}({{ count }}){% if not loop.last %}, {% endif %}{% endfor %}
+
+{% endif %}
+{% endfor %}
+
+{{ eq }}
+END OF REPORT
+{{ eq }}"""
+
+_JINJA_ENV = jinja2.Environment(trim_blocks=True, lstrip_blocks=True, autoescape=False)
+_JINJA_ENV.filters['fmt'] = format
+_JINJA_ENV.filters['fmtbytes'] = format_bytes
+_REPORT_TEMPLATE = _JINJA_ENV.from_string(_REPORT_TEMPLATE_SOURCE, globals={'eq': _EQ, 'dash': _DASH})
+
 
 class FileInfo(BaseModel):
     """Information about a single file."""
@@ -35,65 +99,21 @@ class RepositoryIndex(BaseModel):
     
     def to_text_format(self) -> str:
         """Convert index to human-readable plain text format."""
-        lines = []
-        lines.append("=" * 80)
-        lines.append(f"REPOSITORY INDEX REPORT")
-        lines.append("=" * 80)
-        lines.append(f"Repository: {self.repository_name}")
-        lines.append(f"URL: {self.repository_url}")
-        lines.append(f"Indexed at: {self.indexed_at.strftime('%Y-%m-%d %H:%M:%S')}")
-        lines.append("")
-        
-        lines.append("-" * 80)
-        lines.append("SUMMARY STATISTICS")
-        lines.append("-" * 80)
-        lines.append(f"Total Files: {self.total_files:,}")
-        lines.append(f"Total Directories: {self.total_directories:,}")
-        lines.append(f"Total Size: {self._format_bytes(self.total_size_bytes)}")
-        lines.append(f"Maximum Depth: {self.depth_levels}")
-        lines.append("")
-        
-        lines.append("-" * 80)
-        lines.append("FILE TYPE DISTRIBUTION")
-        lines.append("-" * 80)
-        sorted_types = sorted(self.file_type_distribution.items(), key=lambda x: x[1], reverse=True)
-        for ext, count in sorted_types[:20]:  # Top 20 file types
-            percentage = (count / self.total_files * 100) if self.total_files > 0 else 0
-            ext_display = ext if ext else "(no extension)"
-            lines.append(f"{ext_display:20} {count:8,} files ({percentage:5.2f}%)")
-        lines.append("")
-        
-        lines.append("-" * 80)
-        lines.append("LARGEST FILES")
-        lines.append("-" * 80)
-        for i, file_info in enumerate(self.largest_files[:10], 1):  # Top 10 largest
-            lines.append(f"{i:2}. {self._format_bytes(file_info.size_bytes):>10} - {file_info.path}")
-        lines.append("")
-        
-        lines.append("-" * 80)
-        lines.append("DIRECTORY STATISTICS (Top 20 by file count)")
-        lines.append("-" * 80)
-        sorted_dirs = sorted(self.directory_stats, key=lambda x: x.total_files, reverse=True)
-        for dir_stat in sorted_dirs[:20]:
-            lines.append(f"\n{dir_stat.path}")
-            lines.append(f"  Files: {dir_stat.total_files:,} | Subdirs: {dir_stat.subdirectories:,} | Size: {self._format_bytes(dir_stat.total_size_bytes)}")
-            if dir_stat.file_types:
-                top_types = sorted(dir_stat.file_types.items(), key=lambda x: x[1], reverse=True)[:5]
-                type_str = ", ".join([f"{ext}({count})" for ext, count in top_types])
-                lines.append(f"  Top types: {type_str}")
-        
-        lines.append("")
-        lines.append("=" * 80)
-        lines.append("END OF REPORT")
-        lines.append("=" * 80)
+        # nlargest keeps only the top entries: O(N log 20) instead of sorting everything
+        top_file_types = heapq.nlargest(20, self.file_type_distribution.items(), key=itemgetter(1))
+        top_dirs = [
+            (dir_stat, heapq.nlargest(5, dir_stat.file_types.items(), key=itemgetter(1)))
+            for dir_stat in heapq.nlargest(20, self.directory_stats, key=attrgetter('total_files'))
+        ]
         
-        return "\n".join(lines)
+        return _REPORT_TEMPLATE.render(
+            index=self,
+            top_file_types=top_file_types,
+            largest_files=self.largest_files[:10],  # Top 10 largest
+            top_dirs=top_dirs,
+        )
     
     @staticmethod
     def _format_bytes(bytes_val: int) -> str:
         """Format bytes to human-readable format."""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if bytes_val < 1024.0:
-                return f"{bytes_val:.2f} {unit}"
-            bytes_val /= 1024.0
-        return f"{bytes_val:.2f} PB"
+        return format_bytes(bytes_val)
@@ -1,11 +1,33 @@
-from pathlib import Path
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TextIO
+
 from .output_formatter import (
-    format_hierarchy_tree,
-    format_index_to_text,
+    write_hierarchy_tree_to_stream,
+    write_index_to_stream,
     create_documentation_index
 )
 
 
+def _write_documentation_index(index_data: dict, fp: TextIO) -> None:
+    """Write the documentation guide (a short fixed-size report) to a text stream."""
+    fp.write(create_documentation_index(index_data))
+
+
+def _stream_index_file(path: str, write_index: Callable[[dict, TextIO], None], index_data: dict) -> int:
+    """
+    Stream an index straight into its file; returns bytes written.
+    
+    The report is never held in memory as one string (or a second encoded copy):
+    lines go through a 1 MiB buffer that batches the underlying write() syscalls.
+    """
+    # newline='' writes '\n' as-is on every platform
+    with open(path, 'w', encoding='utf-8', newline='', buffering=1 << 20) as fp:
+        write_index(index_data, fp)
+        # Flushes, then reports the byte offset: the encoded size of the file
+        return fp.tell()
+
+
 def save_all_indexes(
     index_data: dict,
     output_dir: str,
@@ -23,40 +45,37 @@ def save_all_indexes(
         Dictionary with status and paths of saved files
     """
     try:
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
+        # Absolute output directory, computed once; file paths are plain strings under it
+        abs_dir = os.path.abspath(output_dir)
+        os.makedirs(abs_dir, exist_ok=True)
         
         if not repo_name:
             repo_name = index_data.get('repository_name', 'repository')
         
-        results = {}
-        
-        # 1. Save hierarchical tree index (primary, token-optimized)
-        hierarchy_file = output_path / f"{repo_name}_hierarchy.txt"
-        hierarchy_content = format_hierarchy_tree(index_data)
-        hierarchy_file.write_text(hierarchy_content, encoding='utf-8')
-        results['hierarchy'] = {
-            'path': str(hierarchy_file.absolute()),
-            'size': len(hierarchy_content)
+        # Output file and stream writer for each index:
+        # 1. hierarchical tree index (primary, token-optimized)
+        # 2. summary statistics index
+        # 3. documentation subdomain navigation index
+        index_files = {
+            'hierarchy': (os.path.join(abs_dir, f"{repo_name}_hierarchy.txt"), write_hierarchy_tree_to_stream),
+            'summary': (os.path.join(abs_dir, f"{repo_name}_summary.txt"), write_index_to_stream),
+            'documentation': (os.path.join(abs_dir, f"{repo_name}_documentation_guide.txt"), _write_documentation_index),
         }
         
-        # 2. Save summary statistics index
-        summary_file = output_path / f"{repo_name}_summary.txt"
-        summary_content = format_index_to_text(index_data)
-        summary_file.write_text(summary_content, encoding='utf-8')
-        results['summary'] = {
-            'path': str(summary_file.absolute()),
-            'size': len(summary_content)
-        }
+        # The three files are independent: write them concurrently so their
+        # disk I/O (which releases the GIL) overlaps
+        with ThreadPoolExecutor(max_workers=len(index_files)) as executor:
+            futures = {
+                key: executor.submit(_stream_index_file, file_path, write_index, index_data)
+                for key, (file_path, write_index) in index_files.items()
+            }
         
-        # 3. Save documentation subdomain navigation index
-        docs_file = output_path / f"{repo_name}_documentation_guide.txt"
-        docs_content = create_documentation_index(index_data)
-        docs_file.write_text(docs_content, encoding='utf-8')
-        results['documentation'] = {
-            'path': str(docs_file.absolute()),
-            'size': len(docs_content)
-        }
+        results = {}
+        for key, (file_path, _) in index_files.items():
+            results[key] = {
+                'path': file_path,
+                'size': futures[key].result()
+            }
         
         return {
             "status": "success",
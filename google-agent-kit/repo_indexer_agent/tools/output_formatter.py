@@ -1,5 +1,27 @@
+import heapq
+import io
+from bisect import bisect_left
+from itertools import accumulate
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Tuple, TextIO
+
+
+_BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+# Reciprocal of each unit's size; these are exact powers of two, so multiplying
+# gives the same result as dividing
+_BYTE_UNIT_RECIPROCALS = tuple(1 / (1 << (unit * 10)) for unit in range(len(_BYTE_UNITS)))
+
+
+def format_bytes(bytes_val: int) -> str:
+    """Format bytes to human-readable format."""
+    # Each unit is 2**10 of the previous one, so the unit index falls out of
+    # the bit length directly instead of repeatedly dividing by 1024
+    unit = min(max(bytes_val.bit_length() - 1, 0) // 10, len(_BYTE_UNITS) - 1)
+    if not unit:
+        # Plain bytes are whole numbers: skip the float conversion entirely
+        return f"{bytes_val}.00 B"
+    return f"{bytes_val * _BYTE_UNIT_RECIPROCALS[unit]:.2f} {_BYTE_UNITS[unit]}"
 
 
 def format_lines(lines: int) -> str:
@@ -7,144 +29,350 @@ def format_lines(lines: int) -> str:
     return f"{lines:,}"
 
 
-def format_hierarchy_tree(index_data: dict) -> str:
+def write_hierarchy_tree_to_stream(index_data: dict, fp: TextIO) -> None:
     """
-    Format repository index as a hierarchical tree with line counts.
-    Optimized for minimal token usage while showing complete structure.
+    Write the hierarchical tree with line counts line by line to a text stream.
     
     Args:
         index_data: Dictionary with repository index data
-        
-    Returns:
-        Formatted hierarchical tree string
+        fp: Writable text stream (open file, io.StringIO, ...)
     """
-    lines = []
-    lines.append("=" * 80)
-    lines.append(f"{index_data.get('repository_name', 'REPOSITORY').upper()} - HIERARCHICAL INDEX")
-    lines.append("=" * 80)
-    lines.append(f"Indexed: {index_data.get('indexed_at', 'Unknown')[:19]}")
-    total_files = index_data.get('total_files', 0)
-    total_dirs = index_data.get('total_directories', 0)
-    total_lines = index_data.get('total_lines', 0)
-    lines.append(f"Total: {total_files:,} files | {total_dirs:,} dirs | {format_lines(total_lines)} LOC")
-    lines.append("")
+    # Every index_data field is looked up once
+    get = index_data.get
+    total_files = get('total_files', 0)
+    total_dirs = get('total_directories', 0)
+    total_lines = get('total_lines', 0)
+    dir_hierarchy = get('directory_hierarchy', {})
+    
+    # Every line is newline-terminated except the last
+    w = fp.write
+    w("=" * 80 + "\n")
+    w(f"{get('repository_name', 'REPOSITORY').upper()} - HIERARCHICAL INDEX\n")
+    w("=" * 80 + "\n")
+    w(f"Indexed: {get('indexed_at', 'Unknown')[:19]}\n")
+    w(f"Total: {total_files:,} files | {total_dirs:,} dirs | {format_lines(total_lines)} LOC\n")
+    w("\n")
     
     # Build tree structure
-    dir_hierarchy = index_data.get('directory_hierarchy', {})
     if not dir_hierarchy:
-        lines.append("No directory data available")
-        return "\n".join(lines)
+        w("No directory data available")
+        return
     
     # Start with root
-    root_name = index_data.get('repository_name', 'root')
+    root_name = get('repository_name', 'root')
     root_data = dir_hierarchy.get(".", {})
     root_lines = root_data.get('total_lines', total_lines)
-    lines.append(f"{root_name}/ ({format_lines(root_lines)})")
+    w(f"{root_name}/ ({format_lines(root_lines)})\n")
+    
+    # Sort every directory's children once up front, in reverse: they are pushed
+    # onto the stack in that order so they pop in sorted order
+    subdirs_desc = {
+        path: sorted(data.get('subdirectories', []), reverse=True)
+        for path, data in dir_hierarchy.items()
+    }
+    
+    # Walk the tree depth-first with an explicit stack of (dir_path, prefix, is_last):
+    # no Python frame per directory and no recursion limit on deep trees
+    stack = [(subdir, "", i == 0) for i, subdir in enumerate(subdirs_desc.get(".", []))]
+    processed = set()
     
-    # Get all directories and sort
-    all_dirs = sorted([path for path in dir_hierarchy.keys() if path != "."])
+    # Bound methods hoisted out of the per-directory loop
+    pop = stack.pop
+    push = stack.append
+    hierarchy_get = dir_hierarchy.get
+    subdirs_get = subdirs_desc.get
     
-    # Build tree recursively
-    def add_dir_to_tree(dir_path: str, prefix: str, is_last: bool, processed: Set[str]):
+    while stack:
+        dir_path, prefix, is_last = pop()
         if dir_path in processed:
-            return
+            continue
         processed.add(dir_path)
         
-        dir_data = dir_hierarchy.get(dir_path, {})
-        dir_name = Path(dir_path).name
+        dir_data = hierarchy_get(dir_path, {})
+        dir_name = dir_path.rpartition('/')[2]
         dir_lines = dir_data.get('total_lines', 0)
         
-        # Draw tree branch
+        # Draw tree branch (line count formatted inline, same as format_lines)
         branch = "└─" if is_last else "├─ "
-        lines.append(f"{prefix}{branch}{dir_name}/ ({format_lines(dir_lines)})")
+        w(f"{prefix}{branch}{dir_name}/ ({dir_lines:,})\n")
         
         # Get subdirectories
-        subdirs = dir_data.get('subdirectories', [])
+        subdirs = subdirs_get(dir_path)
         if not subdirs:
-            return
+            continue
         
         # Prepare next level prefix
         next_prefix = prefix + ("   " if is_last else "│  ")
         
-        # Sort subdirectories
-        subdirs_sorted = sorted(subdirs)
-        for i, subdir in enumerate(subdirs_sorted):
+        for i, subdir in enumerate(subdirs):
             subdir_path = f"{dir_path}/{subdir}" if dir_path != "." else subdir
-            is_last_subdir = (i == len(subdirs_sorted) - 1)
-            add_dir_to_tree(subdir_path, next_prefix, is_last_subdir, processed)
+            push((subdir_path, next_prefix, i == 0))
     
-    # Process root-level directories
-    root_subdirs = sorted(root_data.get('subdirectories', []))
-    processed_dirs = set()
-    
-    for i, subdir in enumerate(root_subdirs):
-        is_last = (i == len(root_subdirs) - 1)
-        add_dir_to_tree(subdir, "", is_last, processed_dirs)
-    
-    lines.append("")
-    lines.append("=" * 80)
-    
-    return "\n".join(lines)
+    w("\n")
+    w("=" * 80)
 
 
-def format_index_to_text(index_data: dict) -> str:
+def format_hierarchy_tree(index_data: dict) -> str:
     """
-    Format repository index with summary statistics and file type distribution.
+    Format repository index as a hierarchical tree with line counts.
+    Optimized for minimal token usage while showing complete structure.
     
     Args:
         index_data: Dictionary with repository index data
         
     Returns:
-        Formatted text string
+        Formatted hierarchical tree string
+    """
+    buf = io.StringIO()
+    write_hierarchy_tree_to_stream(index_data, buf)
+    return buf.getvalue()
+
+
+def write_index_to_stream(index_data: dict, fp: TextIO) -> None:
     """
-    lines = []
-    lines.append("=" * 80)
-    lines.append("REPOSITORY INDEX REPORT")
-    lines.append("=" * 80)
-    lines.append(f"Repository: {index_data.get('repository_name', 'Unknown')}")
-    if index_data.get('repository_url'):
-        lines.append(f"URL: {index_data['repository_url']}")
-    lines.append(f"Indexed at: {index_data.get('indexed_at', 'Unknown')}")
-    lines.append("")
+    Write the summary report section by section to a text stream.
     
-    lines.append("-" * 80)
-    lines.append("SUMMARY STATISTICS")
-    lines.append("-" * 80)
-    lines.append(f"Total Files: {index_data.get('total_files', 0):,}")
-    lines.append(f"Total Directories: {index_data.get('total_directories', 0):,}")
-    lines.append(f"Total Lines of Code: {format_lines(index_data.get('total_lines', 0))}")
-    lines.append(f"Maximum Depth: {index_data.get('max_depth', 0)}")
-    lines.append("")
+    Args:
+        index_data: Dictionary with repository index data
+        fp: Writable text stream (open file, io.StringIO, ...)
+    """
+    # Every index_data field is looked up once
+    get = index_data.get
+    repo_url = get('repository_url')
+    total_files = get('total_files', 0)
+    file_type_dist = get('file_type_distribution', {})
+    files_by_lines = get('files_by_lines', [])
+    # Size-based indexes (the RepositoryIndex schema) carry these instead of line counts
+    total_size_bytes = get('total_size_bytes')
+    largest_files = get('largest_files', [])
+    directory_stats = get('directory_stats', [])
+    
+    w = fp.write
+    w("=" * 80 + "\n")
+    w("REPOSITORY INDEX REPORT\n")
+    w("=" * 80 + "\n")
+    w(f"Repository: {get('repository_name', 'Unknown')}\n")
+    if repo_url:
+        w(f"URL: {repo_url}\n")
+    w(f"Indexed at: {get('indexed_at', 'Unknown')}\n")
+    w("\n")
+    
+    w("-" * 80 + "\n")
+    w("SUMMARY STATISTICS\n")
+    w("-" * 80 + "\n")
+    w(f"Total Files: {total_files:,}\n")
+    w(f"Total Directories: {get('total_directories', 0):,}\n")
+    if total_size_bytes is not None:
+        w(f"Total Size: {format_bytes(total_size_bytes)}\n")
+    if total_size_bytes is None or 'total_lines' in index_data:
+        w(f"Total Lines of Code: {format_lines(get('total_lines', 0))}\n")
+    w(f"Maximum Depth: {get('max_depth', 0)}\n")
+    w("\n")
     
     # File type distribution
-    file_type_dist = index_data.get('file_type_distribution', {})
     if file_type_dist:
-        lines.append("-" * 80)
-        lines.append("FILE TYPE DISTRIBUTION")
-        lines.append("-" * 80)
-        total_files = index_data.get('total_files', 0)
-        sorted_types = sorted(file_type_dist.items(), key=lambda x: x[1], reverse=True)
-        for ext, count in sorted_types[:20]:
+        w("-" * 80 + "\n")
+        w("FILE TYPE DISTRIBUTION\n")
+        w("-" * 80 + "\n")
+        # nlargest keeps only the top 20: O(N log 20) instead of sorting every type
+        for ext, count in heapq.nlargest(20, file_type_dist.items(), key=itemgetter(1)):
             percentage = (count / total_files * 100) if total_files > 0 else 0
             ext_display = ext if ext else "(no extension)"
-            lines.append(f"{ext_display:20} {count:8,} files ({percentage:5.2f}%)")
-        lines.append("")
+            w(f"{ext_display:20} {count:8,} files ({percentage:5.2f}%)\n")
+        w("\n")
     
     # Files with most lines
-    files_by_lines = index_data.get('files_by_lines', [])
     if files_by_lines:
-        lines.append("-" * 80)
-        lines.append("FILES WITH MOST LINES (Top 10)")
-        lines.append("-" * 80)
+        w("-" * 80 + "\n")
+        w("FILES WITH MOST LINES (Top 10)\n")
+        w("-" * 80 + "\n")
         for i, file_info in enumerate(files_by_lines[:10], 1):
-            lines.append(f"{i:2}. {format_lines(file_info['lines']):>10} LOC - {file_info['path']}")
-        lines.append("")
+            # Width and thousands separator in one format spec, same as format_lines
+            w(f"{i:2}. {file_info['lines']:>10,} LOC - {file_info['path']}\n")
+        w("\n")
+    
+    # Largest files (size-based indexes)
+    if largest_files:
+        w("-" * 80 + "\n")
+        w("LARGEST FILES\n")
+        w("-" * 80 + "\n")
+        for i, file_info in enumerate(largest_files[:10], 1):
+            w(f"{i:2}. {format_bytes(file_info['size_bytes']):>10} - {file_info['path']}\n")
+        w("\n")
     
-    lines.append("=" * 80)
-    lines.append("END OF REPORT")
-    lines.append("=" * 80)
+    # Directory statistics (size-based indexes)
+    if directory_stats:
+        w("-" * 80 + "\n")
+        w("DIRECTORY STATISTICS (Top 20 by file count)\n")
+        w("-" * 80 + "\n")
+        for dir_stat in heapq.nlargest(20, directory_stats, key=itemgetter('total_files')):
+            w(f"\n{dir_stat['path']}\n")
+            w(f"  Files: {dir_stat['total_files']:,} | Subdirs: {dir_stat['subdirectories']:,} | Size: {format_bytes(dir_stat['total_size_bytes'])}\n")
+            file_types = dir_stat.get('file_types')
+            if file_types:
+                top_types = heapq.nlargest(5, file_types.items(), key=itemgetter(1))
+                w(f"  Top types: {', '.join(f'{ext}({count})' for ext, count in top_types)}\n")
+        w("\n")
     
-    return "\n".join(lines)
+    w("=" * 80 + "\n")
+    w("END OF REPORT\n")
+    w("=" * 80)
+
+
+def format_index_to_text(index_data: dict) -> str:
+    """
+    Format repository index with summary statistics and file type distribution.
+    
+    Args:
+        index_data: Dictionary with repository index data
+        
+    Returns:
+        Formatted text string
+    """
+    buf = io.StringIO()
+    write_index_to_stream(index_data, buf)
+    return buf.getvalue()
+
+
+# Common documentation to code mappings for the Linux kernel
+_DOC_MAPPINGS = (
+    {
+        "category": "CORE SUBSYSTEMS",
+        "domains": [
+            {
+                "name": "kernel",
+                "title": "Process Management & Scheduling",
+                "docs": ["Documentation/scheduler/", "Documentation/admin-guide/kernel-parameters.txt"],
+                "code": ["kernel/sched/", "include/linux/sched/"],
+            },
+            {
+                "name": "mm",
+                "title": "Memory Management",
+                "docs": ["Documentation/mm/", "Documentation/admin-guide/mm/"],
+                "code": ["mm/", "include/linux/mm*.h"],
+            },
+            {
+                "name": "locking",
+                "title": "Synchronization & Locking",
+                "docs": ["Documentation/locking/"],
+                "code": ["kernel/locking/", "include/linux/spinlock.h", "include/linux/mutex.h"],
+            },
+        ]
+    },
+    {
+        "category": "FILESYSTEMS",
+        "domains": [
+            {
+                "name": "fs",
+                "title": "Virtual Filesystem Layer",
+                "docs": ["Documentation/filesystems/vfs.rst"],
+                "code": ["fs/*.c", "include/linux/fs.h"],
+            },
+            {
+                "name": "ext4",
+                "title": "EXT4 Filesystem",
+                "docs": ["Documentation/filesystems/ext4/"],
+                "code": ["fs/ext4/"],
+            },
+            {
+                "name": "btrfs",
+                "title": "Btrfs Filesystem",
+                "docs": ["Documentation/filesystems/btrfs.rst"],
+                "code": ["fs/btrfs/"],
+            },
+        ]
+    },
+    {
+        "category": "NETWORKING",
+        "domains": [
+            {
+                "name": "networking",
+                "title": "Network Stack",
+                "docs": ["Documentation/networking/"],
+                "code": ["net/", "drivers/net/", "include/net/"],
+            },
+            {
+                "name": "ipv4",
+                "title": "IPv4 Protocol Implementation",
+                "docs": ["Documentation/networking/ip-sysctl.rst"],
+                "code": ["net/ipv4/"],
+            },
+            {
+                "name": "wireless",
+                "title": "Wireless Subsystem",
+                "docs": ["Documentation/networking/mac80211.rst"],
+                "code": ["net/wireless/", "drivers/net/wireless/"],
+            },
+        ]
+    },
+    {
+        "category": "DEVICE DRIVERS",
+        "domains": [
+            {
+                "name": "gpu",
+                "title": "Graphics Processing Units",
+                "docs": ["Documentation/gpu/"],
+                "code": ["drivers/gpu/drm/"],
+            },
+            {
+                "name": "usb",
+                "title": "USB Subsystem",
+                "docs": ["Documentation/driver-api/usb/"],
+                "code": ["drivers/usb/", "include/linux/usb/"],
+            },
+            {
+                "name": "block",
+                "title": "Block Layer",
+                "docs": ["Documentation/block/"],
+                "code": ["block/", "drivers/block/"],
+            },
+        ]
+    },
+    {
+        "category": "ARCHITECTURE-SPECIFIC",
+        "domains": [
+            {
+                "name": "x86",
+                "title": "x86 Architecture",
+                "docs": ["Documentation/arch/x86/", "Documentation/x86/"],
+                "code": ["arch/x86/"],
+            },
+            {
+                "name": "arm64",
+                "title": "ARM64 Architecture",
+                "docs": ["Documentation/arch/arm64/", "Documentation/arm64/"],
+                "code": ["arch/arm64/"],
+            },
+        ]
+    },
+)
+
+
+def _code_pattern_query(pattern: str) -> Tuple[str, Optional[str]]:
+    """Reduce a code path pattern to (directory path prefix, exact directory path or None)."""
+    if pattern.endswith('/'):
+        return pattern.rstrip('/'), None
+    if '*' in pattern:
+        return pattern.split('*')[0], None
+    return pattern + '\\', pattern
+
+
+# Per category, each domain's fixed text and its code pattern queries, built once at import
+_DOC_INDEX_SECTIONS = tuple(
+    (
+        mapping["category"],
+        tuple(
+            (
+                f"[{domain['name']}] {domain['title']}\n"
+                f"  Docs: {', '.join(domain['docs'])}\n"
+                f"  Code: {', '.join(domain['code'])}\n",
+                tuple(_code_pattern_query(pattern) for pattern in domain['code'])
+            )
+            for domain in mapping["domains"]
+        )
+    )
+    for mapping in _DOC_MAPPINGS
+)
 
 
 def create_documentation_index(index_data: dict) -> str:
@@ -158,165 +386,57 @@ def create_documentation_index(index_data: dict) -> str:
     Returns:
         Formatted documentation navigation guide
     """
-    lines = []
-    lines.append("=" * 80)
-    lines.append("DOCUMENTATION SUBDOMAIN INDEX - AGENT NAVIGATION GUIDE")
-    lines.append("=" * 80)
-    lines.append("")
+    # Written into one growing buffer; every line is newline-terminated except the last
+    buf = io.StringIO()
+    w = buf.write
+    w("=" * 80 + "\n")
+    w("DOCUMENTATION SUBDOMAIN INDEX - AGENT NAVIGATION GUIDE\n")
+    w("=" * 80 + "\n")
+    w("\n")
     
     dir_hierarchy = index_data.get('directory_hierarchy', {})
     
-    # Define common documentation to code mappings for Linux kernel
-    doc_mappings = [
-        {
-            "category": "CORE SUBSYSTEMS",
-            "domains": [
-                {
-                    "name": "kernel",
-                    "title": "Process Management & Scheduling",
-                    "docs": ["Documentation/scheduler/", "Documentation/admin-guide/kernel-parameters.txt"],
-                    "code": ["kernel/sched/", "include/linux/sched/"],
-                },
-                {
-                    "name": "mm",
-                    "title": "Memory Management",
-                    "docs": ["Documentation/mm/", "Documentation/admin-guide/mm/"],
-                    "code": ["mm/", "include/linux/mm*.h"],
-                },
-                {
-                    "name": "locking",
-                    "title": "Synchronization & Locking",
-                    "docs": ["Documentation/locking/"],
-                    "code": ["kernel/locking/", "include/linux/spinlock.h", "include/linux/mutex.h"],
-                },
-            ]
-        },
-        {
-            "category": "FILESYSTEMS",
-            "domains": [
-                {
-                    "name": "fs",
-                    "title": "Virtual Filesystem Layer",
-                    "docs": ["Documentation/filesystems/vfs.rst"],
-                    "code": ["fs/*.c", "include/linux/fs.h"],
-                },
-                {
-                    "name": "ext4",
-                    "title": "EXT4 Filesystem",
-                    "docs": ["Documentation/filesystems/ext4/"],
-                    "code": ["fs/ext4/"],
-                },
-                {
-                    "name": "btrfs",
-                    "title": "Btrfs Filesystem",
-                    "docs": ["Documentation/filesystems/btrfs.rst"],
-                    "code": ["fs/btrfs/"],
-                },
-            ]
-        },
-        {
-            "category": "NETWORKING",
-            "domains": [
-                {
-                    "name": "networking",
-                    "title": "Network Stack",
-                    "docs": ["Documentation/networking/"],
-                    "code": ["net/", "drivers/net/", "include/net/"],
-                },
-                {
-                    "name": "ipv4",
-                    "title": "IPv4 Protocol Implementation",
-                    "docs": ["Documentation/networking/ip-sysctl.rst"],
-                    "code": ["net/ipv4/"],
-                },
-                {
-                    "name": "wireless",
-                    "title": "Wireless Subsystem",
-                    "docs": ["Documentation/networking/mac80211.rst"],
-                    "code": ["net/wireless/", "drivers/net/wireless/"],
-                },
-            ]
-        },
-        {
-            "category": "DEVICE DRIVERS",
-            "domains": [
-                {
-                    "name": "gpu",
-                    "title": "Graphics Processing Units",
-                    "docs": ["Documentation/gpu/"],
-                    "code": ["drivers/gpu/drm/"],
-                },
-                {
-                    "name": "usb",
-                    "title": "USB Subsystem",
-                    "docs": ["Documentation/driver-api/usb/"],
-                    "code": ["drivers/usb/", "include/linux/usb/"],
-                },
-                {
-                    "name": "block",
-                    "title": "Block Layer",
-                    "docs": ["Documentation/block/"],
-                    "code": ["block/", "drivers/block/"],
-                },
-            ]
-        },
-        {
-            "category": "ARCHITECTURE-SPECIFIC",
-            "domains": [
-                {
-                    "name": "x86",
-                    "title": "x86 Architecture",
-                    "docs": ["Documentation/arch/x86/", "Documentation/x86/"],
-                    "code": ["arch/x86/"],
-                },
-                {
-                    "name": "arm64",
-                    "title": "ARM64 Architecture",
-                    "docs": ["Documentation/arch/arm64/", "Documentation/arm64/"],
-                    "code": ["arch/arm64/"],
-                },
-            ]
-        },
-    ]
+    # Directory paths in sorted order with a running total of their lines, so the
+    # lines under any path prefix are one bisect-bounded slice: O(log N) per query
+    # instead of a scan over every directory
+    sorted_dirs = sorted(dir_hierarchy.items())
+    dir_keys = [dir_path for dir_path, _ in sorted_dirs]
+    cumulative_lines = list(accumulate((dir_data.get('total_lines', 0) for _, dir_data in sorted_dirs), initial=0))
+    
+    def get_lines_for_prefix(prefix: str) -> int:
+        if not prefix:
+            return cumulative_lines[-1]
+        # Every path starting with prefix sorts before prefix with its last character bumped
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return cumulative_lines[bisect_left(dir_keys, upper)] - cumulative_lines[bisect_left(dir_keys, prefix)]
     
-    # Helper to calculate lines for a path pattern
-    def get_lines_for_pattern(pattern: str) -> int:
-        total = 0
-        for dir_path, dir_data in dir_hierarchy.items():
-            # Simple pattern matching
-            if pattern.endswith('/'):
-                if dir_path.startswith(pattern.rstrip('/')):
-                    total += dir_data.get('total_lines', 0)
-            elif '*' in pattern:
-                base = pattern.split('*')[0]
-                if dir_path.startswith(base):
-                    total += dir_data.get('total_lines', 0)
-            elif dir_path == pattern or dir_path.startswith(pattern + '\\'):
-                total += dir_data.get('total_lines', 0)
+    # Helper to calculate lines for a precompiled code pattern query
+    def get_lines_for_query(prefix: str, exact: Optional[str]) -> int:
+        total = get_lines_for_prefix(prefix)
+        if exact is not None and exact in dir_hierarchy:
+            total += dir_hierarchy[exact].get('total_lines', 0)
         return total
     
     # Format each category
-    for mapping in doc_mappings:
-        lines.append(mapping["category"])
-        lines.append("─" * 80)
+    for category, domains in _DOC_INDEX_SECTIONS:
+        w(f"{category}\n")
+        w("─" * 80 + "\n")
         
-        for domain in mapping["domains"]:
-            lines.append(f"[{domain['name']}] {domain['title']}")
-            lines.append(f"  Docs: {', '.join(domain['docs'])}")
-            lines.append(f"  Code: {', '.join(domain['code'])}")
+        for domain_text, code_queries in domains:
+            w(domain_text)
             
             # Calculate approximate LOC
-            total_loc = sum(get_lines_for_pattern(path) for path in domain['code'])
+            total_loc = sum(get_lines_for_query(prefix, exact) for prefix, exact in code_queries)
             if total_loc > 0:
-                lines.append(f"  Lines: ~{format_lines(total_loc)} LOC")
+                w(f"  Lines: ~{total_loc:,} LOC\n")
             
-            lines.append("")
+            w("\n")
         
-        lines.append("")
+        w("\n")
     
-    lines.append("=" * 80)
+    w("=" * 80)
     
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 def save_index_to_file(
@@ -339,17 +459,19 @@ def save_index_to_file(
         # Create parent directories if needed
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
-        # Format the output
-        content = format_index_to_text(index_data)
-        
-        # Write to file
-        output_file.write_text(content, encoding='utf-8')
+        # The summary report is a fixed number of top-N sections, so it is small:
+        # encode it once and hand it to the binary file in a single write, which
+        # skips the TextIOWrapper and reports the real size on disk
+        data = format_index_to_text(index_data).encode('utf-8')
+        with open(output_file, 'wb', buffering=0) as f:
+            f.write(data)
+        size = len(data)
         
         return {
             "status": "success",
             "message": f"Index saved successfully to {output_path}",
             "path": str(output_file.absolute()),
-            "size_bytes": len(content)
+            "size_bytes": size
         }
         
     except Exception as e: